@@ -46,6 +46,8 @@ class Body(object):
     # Geometrix matrix K (see paper Delong et al. 2015).
     self.K = None
     self.rotation_matrix = None
+    # Cache for the rotation blocks, pair (orientation entries, blocks)
+    self._rot_matrix_cache = None
     # Some default functions
     self.function_slip = self.default_zero_blobs
     self.function_force = self.default_none
@@ -74,13 +76,23 @@ class Body(object):
     return r_vectors   
 
 
-  def calc_rot_matrix(self, location = None, orientation = None):
-    ''' 
-    Calculate the matrix R, where the i-th 3x3 block of R gives
-    (R_i x) = -1 (r_i cross x).
-    R has shape (3*Nblobs, 3).
+  def calc_rot_matrix_blocks(self, location = None, orientation = None):
+    '''
+    Calculate the 3x3 blocks of the matrix R (see calc_rot_matrix)
+    as an array with shape (Nblobs, 3, 3).
+
+    The blocks depend only on the orientation of the body, so the
+    result is cached and reused until the orientation changes; the
+    cached array is marked read-only and must not be modified in
+    place. Calls with an explicit location or orientation bypass
+    the cache.
     '''
-    r_vectors = self.get_r_vectors(location, orientation) - (self.location if location is None else location)    
+    if location is None and orientation is None:
+      cache = self._rot_matrix_cache
+      if cache is not None and np.array_equal(cache[0], self.orientation.entries):
+        return cache[1]
+
+    r_vectors = self.get_r_vectors(location, orientation) - (self.location if location is None else location)
     rot_matrix = np.zeros((r_vectors.shape[0], 3, 3))
     rot_matrix[:,0,1] = r_vectors[:,2]
     rot_matrix[:,0,2] = -r_vectors[:,1]
@@ -89,7 +101,23 @@ class Body(object):
     rot_matrix[:,2,0] = r_vectors[:,1]
     rot_matrix[:,2,1] = -r_vectors[:,0]
 
-    return np.reshape(rot_matrix, (3*self.Nblobs, 3))
+    if location is None and orientation is None:
+      # Freeze the cached array so in-place edits by callers cannot
+      # corrupt the cache
+      rot_matrix.flags.writeable = False
+      self._rot_matrix_cache = (np.copy(self.orientation.entries), rot_matrix)
+    return rot_matrix
+
+
+  def calc_rot_matrix(self, location = None, orientation = None):
+    '''
+    Calculate the matrix R, where the i-th 3x3 block of R gives
+    (R_i x) = -1 (r_i cross x).
+    R has shape (3*Nblobs, 3).
+    '''
+    # Copy so the caller gets a writable array that does not alias
+    # the rotation blocks cache
+    return np.reshape(self.calc_rot_matrix_blocks(location, orientation), (3*self.Nblobs, 3)).copy()
 
 
   def calc_J_matrix(self):
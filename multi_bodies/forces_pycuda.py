@@ -116,6 +116,45 @@ __global__ void calc_blob_blob_force(const real *x,
   f[offset_i + 1] = fy;
   f[offset_i + 2] = fz;
 }
+
+/*
+ This function computes the one-blob force (gravity plus wall
+ interaction) for all blobs, one thread per blob. The wall
+ interaction is derived from the potential
+
+ U(z) = U0 + U0 * (a-z)/b   if z<a
+ U(z) = U0 * exp(-(z-a)/b)  iz z>=a
+
+ with
+ U0 = repulsion_strength_wall
+ a  = blob_radius
+ b  = debye_length_wall
+*/
+__global__ void calc_one_blob_force(const real *x,
+                                    real *f,
+                                    const real g,
+                                    const real blob_mass,
+                                    const real blob_radius,
+                                    const real repulsion_strength_wall,
+                                    const real debye_length_wall,
+                                    const int number_of_blobs){
+  int i = blockDim.x * blockIdx.x + threadIdx.x;
+  if(i >= number_of_blobs) return;
+
+  int offset_i = i * 3;
+
+  // Distance to the wall; below the blob radius the exponent is
+  // clamped to zero, the linear branch of the potential
+  real h = x[offset_i + 2] - blob_radius;
+  if(h < 0){
+    h = 0;
+  }
+
+  // Return forces, gravity plus wall interaction
+  f[offset_i]     = 0;
+  f[offset_i + 1] = 0;
+  f[offset_i + 2] = (repulsion_strength_wall / debye_length_wall) * exp(-h / debye_length_wall) - g * blob_mass;
+}
 """)
 
 def real(x):
@@ -178,3 +217,39 @@ def calc_blob_blob_forces_pycuda(r_vectors, *args, **kwargs):
   cuda.memcpy_dtoh(f, f_gpu)
 
   return np.reshape(f, (number_of_blobs, 3))
+
+
+def calc_one_blob_forces_pycuda(r_vectors, *args, **kwargs):
+
+  # Determine number of threads and blocks for the GPU
+  number_of_blobs = np.int32(len(r_vectors))
+  threads_per_block, num_blocks = set_number_of_threads_and_blocks(number_of_blobs)
+
+  # Get parameters from arguments
+  blob_mass = kwargs.get('blob_mass')
+  blob_radius = kwargs.get('blob_radius')
+  g = kwargs.get('g')
+  repulsion_strength_wall = kwargs.get('repulsion_strength_wall')
+  debye_length_wall = kwargs.get('debye_length_wall')
+
+  # Reshape arrays
+  x = real(np.reshape(r_vectors, number_of_blobs * 3))
+  f = real(np.empty_like(x))
+
+  # Allocate GPU memory
+  x_gpu = cuda.mem_alloc(x.nbytes)
+  f_gpu = cuda.mem_alloc(f.nbytes)
+
+  # Copy data to the GPU (host to device)
+  cuda.memcpy_htod(x_gpu, x)
+
+  # Get one-blob force function
+  force = mod.get_function("calc_one_blob_force")
+
+  # Compute one-blob forces
+  force(x_gpu, f_gpu, real(g), real(blob_mass), real(blob_radius), real(repulsion_strength_wall), real(debye_length_wall), number_of_blobs, block=(threads_per_block, 1, 1), grid=(num_blocks, 1))
+
+  # Copy data from GPU to CPU (device to host)
+  cuda.memcpy_dtoh(f, f_gpu)
+
+  return np.reshape(f, (number_of_blobs, 3))
@@ -65,11 +65,9 @@ def calc_slip(bodies, Nblobs, *args, **kwargs):
 
   if np.amax(np.absolute(torque_blobs))>0:
     implementation = kwargs.get('implementation')
-    offset = 0
-    for b in bodies:
-      if b.Nblobs>1:
-        torque_blobs[offset:offset+b.Nblobs] = 0.0  
-      offset += b.Nblobs
+    # Zero the torques on the blobs of multiblob bodies in one pass
+    Nblobs_per_body = np.array([b.Nblobs for b in bodies])
+    torque_blobs[np.repeat(Nblobs_per_body > 1, Nblobs_per_body)] = 0.0
     if implementation == 'pycuda':
       slip_blobs = mb.single_wall_mobility_trans_times_torque_pycuda(r_vectors, torque_blobs, eta, a) 
     elif implementation == 'pycuda_no_wall':
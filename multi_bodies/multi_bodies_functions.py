@@ -133,10 +133,8 @@ def active_body_slip(body, slip):
   # Get rotation matrix
   rotation_matrix = body.orientation.rotation_matrix()
 
-  # Rotate  slip on each blob
-  slip_rotated = np.empty((body.Nblobs, 3))
-  for i in range(body.Nblobs):
-    slip_rotated[i] = np.dot(rotation_matrix, slip[i])
+  # Rotate the slip on all the blobs at once
+  slip_rotated = np.dot(np.reshape(slip, (body.Nblobs, 3)), rotation_matrix.T)
   return slip_rotated
 
 
@@ -150,6 +148,30 @@ def bodies_external_force_torque(bodies, r_vectors, *args, **kwargs):
   return np.zeros((2*len(bodies), 3))
   
 
+def make_blob_external_forces(g, blob_mass, blob_radius, repulsion_strength_wall, debye_length_wall):
+  '''
+  Build a version of blob_external_forces specialized for fixed
+  parameters; the derived constants (e.g. the wall force scale
+  e / b) are evaluated here once instead of on every call. The
+  parameters are constant during a simulation so the returned
+  function can be reused for all the force evaluations.
+  '''
+  force_wall = repulsion_strength_wall / debye_length_wall
+  inv_debye_wall = 1.0 / debye_length_wall
+  force_gravity = g * blob_mass
+
+  def blob_external_forces_specialized(r_vectors):
+    f = np.zeros((r_vectors.shape[0], 3))
+    # Add gravity and wall interaction in a single pass over h; for
+    # h <= blob_radius the exponent is clamped to zero, which recovers
+    # the constant force of the linear branch of the potential
+    h = r_vectors[:,2]
+    f[:,2] = force_wall * np.exp(-np.maximum(h - blob_radius, 0.) * inv_debye_wall) - force_gravity
+    return f
+  return blob_external_forces_specialized
+
+
+@utils.static_var('specialized', None)
 def blob_external_forces(r_vectors, *args, **kwargs):
   '''
   This function compute the external force acting on a
@@ -167,75 +189,41 @@ def blob_external_forces(r_vectors, *args, **kwargs):
   h = distance to the wall
   b = debye_length_wall
   '''
-  N = r_vectors.size // 3
-  f = np.zeros((N, 3))
-
   # Get parameters from arguments
   blob_mass = kwargs.get('blob_mass')
   blob_radius = kwargs.get('blob_radius')
   g = kwargs.get('g')
   repulsion_strength_wall = kwargs.get('repulsion_strength_wall')
   debye_length_wall = kwargs.get('debye_length_wall')
-  # Add gravity
-  f[:,2] = -g * blob_mass
 
-  # Add wall interaction
-  h = r_vectors[:,2]
-  lr_mask = h > blob_radius
-  sr_mask = h <= blob_radius
-  f[lr_mask,2] += (repulsion_strength_wall / debye_length_wall) * np.exp(-(h[lr_mask]-blob_radius)/debye_length_wall)
-  f[sr_mask,2] += (repulsion_strength_wall / debye_length_wall)
+  # Reuse the specialization of the previous call if the parameters
+  # are unchanged
+  params = (g, blob_mass, blob_radius, repulsion_strength_wall, debye_length_wall)
+  cached = blob_external_forces.specialized
+  if cached is None or cached[0] != params:
+    cached = (params, make_blob_external_forces(*params))
+    blob_external_forces.specialized = cached
 
-  return f
+  return cached[1](r_vectors)
 
 def blob_external_force(r_vectors, *args, **kwargs):
   '''
   This function compute the external force acting on a
   single blob. It returns an array with shape (3).
-  
-  In this example we add gravity and a repulsion with the wall;
-  the interaction with the wall is derived from the potential
-
-  U(z) = U0 + U0 * (a-z)/b   if z<a
-  U(z) = U0 * exp(-(z-a)/b)  iz z>=a
 
-  with 
-  e = repulsion_strength_wall
-  a = blob_radius
-  h = distance to the wall
-  b = debye_length_wall
+  It is a thin wrapper around the vectorized function
+  blob_external_forces, kept for API compatibility; see that
+  function for the definition of the potential.
   '''
-  f = np.zeros(3)
-
-  # Get parameters from arguments
-  blob_mass = kwargs.get('blob_mass')
-  blob_radius = kwargs.get('blob_radius')
-  g = kwargs.get('g')
-  repulsion_strength_wall = kwargs.get('repulsion_strength_wall') 
-  debye_length_wall = kwargs.get('debye_length_wall')
-  # Add gravity
-  f += -g * blob_mass * np.array([0., 0., 1.0])
-
-  # Add wall interaction
-  h = r_vectors[2]
-  if h > blob_radius:
-    f[2] += (repulsion_strength_wall / debye_length_wall) * np.exp(-(h-blob_radius)/debye_length_wall)
-  else:
-    f[2] += (repulsion_strength_wall / debye_length_wall)
-  return f
+  return blob_external_forces(np.reshape(r_vectors, (1, 3)), *args, **kwargs)[0]
 
 
 def calc_one_blob_forces(r_vectors, *args, **kwargs):
   '''
   Compute one-blob forces. It returns an array with shape (Nblobs, 3).
   '''
-  Nblobs = r_vectors.size // 3
-  force_blobs = np.zeros((Nblobs, 3))
-  r_vectors = np.reshape(r_vectors, (Nblobs, 3))
-  
-  # Loop over blobs
-  force_blobs = blob_external_forces(r_vectors, *args, **kwargs)
-  return force_blobs
+  r_vectors = np.reshape(r_vectors, (-1, 3))
+  return blob_external_forces(r_vectors, *args, **kwargs)
 
 
 def calc_one_blob_torques(r_vectors, *args, **kwargs):
@@ -246,6 +234,22 @@ def calc_one_blob_torques(r_vectors, *args, **kwargs):
   return np.zeros((Nblobs, 3)) 
 
 
+def set_one_blob_forces(implementation):
+  '''
+  Set the function to compute the one-blob forces
+  to the right function.
+  To use the pycuda implementation is necessary to have installed
+  pycuda and a GPU with CUDA capabilities. It can be selected from
+  user_defined_functions.py with
+
+  calc_one_blob_forces = set_one_blob_forces('pycuda')
+  '''
+  if implementation == 'python':
+    return calc_one_blob_forces
+  elif implementation == 'pycuda':
+    return forces_pycuda.calc_one_blob_forces_pycuda
+
+
 def set_blob_blob_forces(implementation):
   '''
   Set the function to compute the blob-blob forces
@@ -260,6 +264,8 @@ def set_blob_blob_forces(implementation):
     return default_zero_r_vectors
   elif implementation == 'python':
     return calc_blob_blob_forces_python
+  elif implementation == 'cell_list':
+    return calc_blob_blob_forces_cell_list
   elif implementation == 'C++':
     return calc_blob_blob_forces_cpp
   elif implementation == 'pycuda':
@@ -315,20 +321,28 @@ def blob_blob_force(r, *args, **kwargs):
     return -((eps / b) * np.exp(-(r_norm-2*a) / b) / np.maximum(r_norm, np.finfo(float).eps)) * r 
   else:
     return -((eps / b) / np.maximum(r_norm, np.finfo(float).eps)) * r;
-  
 
-def calc_blob_blob_forces_python(r_vectors, *args, **kwargs):
+
+# Keep a reference to the default pair force to detect when the user
+# has overridden blob_blob_force (e.g. from user_defined_functions.py)
+_blob_blob_force_default = blob_blob_force
+
+
+def calc_blob_blob_forces_loop(r_vectors, *args, **kwargs):
   '''
-  This function computes the blob-blob forces and returns
-  an array with shape (Nblobs, 3).
+  This function computes the blob-blob forces calling blob_blob_force
+  for each pair of blobs and returns an array with shape (Nblobs, 3).
+  It is used when the pair force has been overridden, since then the
+  broadcast kernel of calc_blob_blob_forces_python does not apply.
   '''
-  Nblobs = r_vectors.size // 3
+  r_vectors = np.reshape(r_vectors, (-1, 3))
+  Nblobs = r_vectors.shape[0]
   force_blobs = np.zeros((Nblobs, 3))
 
   # Double loop over blobs to compute forces
   for i in range(Nblobs-1):
     for j in range(i+1, Nblobs):
-      # Compute vector from j to u
+      # Compute vector from i to j
       r = r_vectors[j] - r_vectors[i]
       force = blob_blob_force(r, *args, **kwargs)
       force_blobs[i] += force
@@ -337,6 +351,243 @@ def calc_blob_blob_forces_python(r_vectors, *args, **kwargs):
   return force_blobs
 
 
+def calc_blob_blob_forces_python(r_vectors, *args, **kwargs):
+  '''
+  This function computes the blob-blob forces and returns
+  an array with shape (Nblobs, 3).
+
+  It evaluates the same pair force as blob_blob_force but
+  vectorized with numpy; all the pairwise displacements are
+  built with broadcasting instead of looping over pairs of
+  blobs in python. If blob_blob_force has been overridden the
+  computation dispatches through it pair by pair instead.
+  '''
+  # Dispatch through an overridden pair force
+  if blob_blob_force is not _blob_blob_force_default:
+    return calc_blob_blob_forces_loop(r_vectors, *args, **kwargs)
+
+  # Get parameters from arguments
+  L = kwargs.get('periodic_length')
+  eps = kwargs.get('repulsion_strength')
+  b = kwargs.get('debye_length')
+  a = kwargs.get('blob_radius')
+
+  r_vectors = np.reshape(r_vectors, (-1, 3))
+  Nblobs = r_vectors.shape[0]
+
+  # Enumerate each pair once; by Newton's third law f_ji = -f_ij,
+  # which halves the work of the full broadcast
+  i, j = np.triu_indices(Nblobs, k=1)
+
+  # Copy each coordinate to its own contiguous array so the ufuncs
+  # below stream over unit-stride memory
+  rx_vec = np.copy(r_vectors[:,0])
+  ry_vec = np.copy(r_vectors[:,1])
+  rz_vec = np.copy(r_vectors[:,2])
+
+  # Compute displacements r_ij = r_j - r_i for the pairs
+  rx = rx_vec[j] - rx_vec[i]
+  ry = ry_vec[j] - ry_vec[i]
+  rz = rz_vec[j] - rz_vec[i]
+
+  # Project displacements to the minimal periodic image
+  if L is not None:
+    for dr, Li in zip((rx, ry, rz), L):
+      if Li > 0:
+        dr -= np.trunc(dr / Li + 0.5 * np.sign(dr)) * Li
+
+  # Compute distances between blobs
+  r_norm = np.sqrt(rx*rx + ry*ry + rz*rz)
+
+  # Compute the force magnitude over distance for all pairs; both
+  # branches of the np.where are evaluated, so the denominator is
+  # clamped in both to stay quiet for coincident blobs
+  r_norm_safe = np.maximum(r_norm, np.finfo(float).eps)
+  f0 = np.where(r_norm > 2*a,
+                -((eps / b) * np.exp(-(r_norm - 2*a) / b) / r_norm_safe),
+                -((eps / b) / r_norm_safe))
+
+  # Scatter-add the pair forces on both members of each pair
+  force_pairs = np.empty((i.size, 3))
+  force_pairs[:,0] = f0 * rx
+  force_pairs[:,1] = f0 * ry
+  force_pairs[:,2] = f0 * rz
+  force_blobs = np.zeros(r_vectors.shape)
+  np.add.at(force_blobs, i, force_pairs)
+  np.add.at(force_blobs, j, -force_pairs)
+  return force_blobs
+
+
+class YukawaTable(object):
+  '''
+  Tabulate the magnitude over distance of the blob-blob force,
+
+  f(r) / r = -(eps / b) * exp(-(r - 2*a) / b) / r,
+
+  on a uniform grid in [2*a, rcut] and evaluate it with piecewise
+  cubic Hermite interpolation. This removes the exponential from
+  the inner loop of the force kernels; with the default number of
+  points the relative interpolation error is of order 1e-9, ample
+  for this soft repulsion.
+  '''
+  def __init__(self, eps, b, a, rcut, npts=1024):
+    self.eps = eps
+    self.b = b
+    self.a = a
+    self.rcut = rcut
+    r = np.linspace(2*a, rcut, npts+1)
+    self.r_min = r[0]
+    self.interval = r[1] - r[0]
+
+    # Values and derivatives of f(r)/r at the nodes
+    r_safe = np.maximum(r, np.finfo(float).eps)
+    f = -(eps / b) * np.exp(-(r - 2*a) / b) / r_safe
+    df = -f * (1.0 / b + 1.0 / r_safe)
+
+    # Coefficients of the cubic Hermite polynomial of each interval
+    h = self.interval
+    f0, f1 = f[:-1], f[1:]
+    d0, d1 = df[:-1], df[1:]
+    self.c0 = f0
+    self.c1 = h * d0
+    self.c2 = 3.0*(f1 - f0) - h*(2.0*d0 + d1)
+    self.c3 = 2.0*(f0 - f1) + h*(d0 + d1)
+
+  def eval(self, r):
+    '''
+    Return the interpolated f(r)/r. Distances larger than rcut give
+    zero force; distances below 2*a are clamped to the first node.
+    '''
+    t = (np.clip(r, self.r_min, self.rcut) - self.r_min) / self.interval
+    point = np.minimum(t.astype(int), self.c0.size - 1)
+    delta = t - point
+    f = ((self.c3[point]*delta + self.c2[point])*delta + self.c1[point])*delta + self.c0[point]
+    return np.where(r > self.rcut, 0.0, f)
+
+
+@utils.static_var('yukawa_table', None)
+def calc_blob_blob_forces_cell_list(r_vectors, *args, **kwargs):
+  '''
+  This function computes the blob-blob forces using a cell list
+  and returns an array with shape (Nblobs, 3).
+
+  The blob centers are binned in a grid of cells of side at least
+  rcut = 2*a + 30*b, beyond which the pair force is negligible,
+  and only pairs in the same or in adjacent cells are evaluated.
+  In periodic directions the grid tiles the box and the adjacency
+  wraps around, so pairs interacting across the boundary are
+  enumerated like any other. For homogeneous suspensions the cost
+  scales like O(Nblobs) instead of O(Nblobs**2). The exponential
+  branch of the pair force is evaluated with a precomputed
+  YukawaTable.
+  '''
+  # Get parameters from arguments
+  L = kwargs.get('periodic_length')
+  eps = kwargs.get('repulsion_strength')
+  b = kwargs.get('debye_length')
+  a = kwargs.get('blob_radius')
+  rcut = 2 * a + 30 * b
+
+  r_vectors = np.reshape(r_vectors, (-1, 3))
+  Nblobs = r_vectors.shape[0]
+  force_blobs = np.zeros((Nblobs, 3))
+  if Nblobs == 0:
+    return force_blobs
+
+  # Build, or reuse, the table of the pair force
+  table = calc_blob_blob_forces_cell_list.yukawa_table
+  if table is None or table.eps != eps or table.b != b or table.a != a or table.rcut != rcut:
+    table = YukawaTable(eps, b, a, rcut)
+    calc_blob_blob_forces_cell_list.yukawa_table = table
+
+  # Bin blob centers in a grid of cells of side at least rcut. In
+  # periodic directions the coordinates are wrapped into the box and
+  # the grid tiles the box exactly, so neighbor cells wrap around; in
+  # open directions the grid just covers the blob positions.
+  periodic = [False, False, False]
+  r_grid = np.copy(r_vectors)
+  Ncells = np.ones(3, dtype=int)
+  for i in range(3):
+    if L is not None and L[i] > 0:
+      periodic[i] = True
+      Ncells[i] = max(int(L[i] // rcut), 1)
+      r_grid[:,i] -= np.floor(r_grid[:,i] / L[i]) * L[i]
+      r_grid[:,i] *= Ncells[i] / L[i]
+    else:
+      r_grid[:,i] /= rcut
+  cells = np.floor(r_grid).astype(int)
+  for i in range(3):
+    if periodic[i]:
+      # Guard against round-off placing a wrapped coordinate at L[i]
+      cells[:,i] = np.clip(cells[:,i], 0, Ncells[i] - 1)
+    else:
+      cells[:,i] -= np.min(cells[:,i])
+      Ncells[i] = np.max(cells[:,i]) + 1
+  cell_id = (cells[:,0] * Ncells[1] + cells[:,1]) * Ncells[2] + cells[:,2]
+
+  # Group blob indices by cell
+  order = np.argsort(cell_id)
+  unique_cells, cell_start = np.unique(cell_id[order], return_index=True)
+  cell_end = np.concatenate([cell_start[1:], [Nblobs]])
+  cell_to_group = {c: k for k, c in enumerate(unique_cells)}
+
+  # Loop over occupied cells and their 27 neighbor cells
+  for k in range(unique_cells.size):
+    indices_i = order[cell_start[k]:cell_end[k]]
+    cx, cy, cz = cells[indices_i[0]]
+    # Collect the neighbor cell ids in a set, which avoids enumerating
+    # a pair twice when a periodic direction has fewer than three cells
+    neighbors = set()
+    for ox in range(-1, 2):
+      nx = cx + ox
+      if periodic[0]:
+        nx %= Ncells[0]
+      elif nx < 0 or nx >= Ncells[0]:
+        continue
+      for oy in range(-1, 2):
+        ny = cy + oy
+        if periodic[1]:
+          ny %= Ncells[1]
+        elif ny < 0 or ny >= Ncells[1]:
+          continue
+        for oz in range(-1, 2):
+          nz = cz + oz
+          if periodic[2]:
+            nz %= Ncells[2]
+          elif nz < 0 or nz >= Ncells[2]:
+            continue
+          neighbors.add((nx * Ncells[1] + ny) * Ncells[2] + nz)
+    indices_j = []
+    for neighbor in neighbors:
+      kn = cell_to_group.get(neighbor)
+      if kn is not None:
+        indices_j.append(order[cell_start[kn]:cell_end[kn]])
+    indices_j = np.concatenate(indices_j)
+
+    # Compute displacements r_ij = r_j - r_i between blobs in the
+    # cell and blobs in the neighbor cells
+    diff = r_vectors[indices_j][None,:,:] - r_vectors[indices_i][:,None,:]
+
+    # Project displacements to the minimal periodic image
+    if L is not None:
+      for i in range(3):
+        if L[i] > 0:
+          diff[:,:,i] -= np.trunc(diff[:,:,i] / L[i] + 0.5 * np.sign(diff[:,:,i])) * L[i]
+
+    # Compute distances; exclude the self-interaction
+    r_norm = np.sqrt(np.sum(diff**2, axis=2))
+    r_norm[indices_i[:,None] == indices_j[None,:]] = np.inf
+
+    # Compute the force magnitude over distance for all pairs; the
+    # exponential branch comes from the interpolation table
+    f0 = np.where(r_norm > 2*a,
+                  table.eval(r_norm),
+                  -((eps / b) / np.maximum(r_norm, np.finfo(float).eps)))
+    force_blobs[indices_i] = np.sum(f0[:,:,None] * diff, axis=1)
+
+  return force_blobs
+
+
 def set_body_body_forces_torques(implementation):
   '''
   Set the function to compute the body-body forces
@@ -400,34 +651,47 @@ def calc_body_body_forces_torques_python(bodies, r_vectors, *args, **kwargs):
   return force_torque_bodies
 
 
+def bodies_to_soa(bodies):
+  '''
+  Build a structure-of-arrays representation of the bodies.
+  It returns the blob offsets of each body, an array with shape
+  (Nbodies + 1), and the 3x3 rotation blocks of all the blobs
+  stacked in a single array with shape (Nblobs, 3, 3).
+  '''
+  offsets = np.zeros(len(bodies) + 1, dtype=int)
+  rotation_blocks = []
+  for k, b in enumerate(bodies):
+    offsets[k+1] = offsets[k] + b.Nblobs
+    rotation_blocks.append(b.calc_rot_matrix_blocks())
+  return offsets, np.concatenate(rotation_blocks, axis=0)
+
+
 def force_torque_calculator_sort_by_bodies(bodies, r_vectors, *args, **kwargs):
   '''
   Return the forces and torque in each body with
   format [f_1, t_1, f_2, t_2, ...] and shape (2*Nbodies, 3),
   where f_i and t_i are the force and torque on the body i.
   '''
+  # Standardize the blob coordinates to a (Nblobs, 3) C-contiguous array
+  r_vectors = np.ascontiguousarray(r_vectors).reshape(-1, 3)
+
   # Create auxiliar variables
-  Nblobs = r_vectors.size // 3
   force_torque_bodies = np.zeros((2*len(bodies), 3))
-  force_blobs = np.zeros((Nblobs, 3))
   blob_mass = 1.0
   blob_radius = bodies[0].blob_radius
 
   # Compute one-blob forces (same function for all blobs)
-  force_blobs += calc_one_blob_forces(r_vectors, blob_radius = blob_radius, blob_mass = blob_mass, *args, **kwargs)
+  force_blobs = calc_one_blob_forces(r_vectors, blob_radius = blob_radius, blob_mass = blob_mass, *args, **kwargs)
 
   # Compute blob-blob forces (same function for all pair of blobs)
-  force_blobs += calc_blob_blob_forces(r_vectors, blob_radius = blob_radius, *args, **kwargs)  
-
-  # Compute body force-torque forces from blob forces
-  offset = 0
-  for k, b in enumerate(bodies):
-    # Add force to the body
-    force_torque_bodies[2*k:(2*k+1)] += sum(force_blobs[offset:(offset+b.Nblobs)])
-    # Add torque to the body
-    R = b.calc_rot_matrix()  
-    force_torque_bodies[2*k+1:2*k+2] += np.dot(R.T, np.reshape(force_blobs[offset:(offset+b.Nblobs)], 3*b.Nblobs))
-    offset += b.Nblobs
+  force_blobs += calc_blob_blob_forces(r_vectors, blob_radius = blob_radius, *args, **kwargs)
+
+  # Compute body force-torque from blob forces; the forces and the
+  # torques of the blobs of each body are summed in a single pass
+  offsets, rotation_blocks = bodies_to_soa(bodies)
+  force_torque_bodies[0::2] = np.add.reduceat(force_blobs, offsets[:-1], axis=0)
+  torque_blobs = np.einsum('nij,ni->nj', rotation_blocks, force_blobs)
+  force_torque_bodies[1::2] = np.add.reduceat(torque_blobs, offsets[:-1], axis=0)
 
   # Add one-body external force-torque
   force_torque_bodies += bodies_external_force_torque(bodies, r_vectors, *args, **kwargs)
@@ -57,11 +57,6 @@ if __name__ == '__main__':
     force_python = mbf.calc_blob_blob_forces_python(r_vectors, blob_radius=a, debye_length=b, repulsion_strength=eps, periodic_length=L)
     timer('python')
 
-  if found_boost:
-    timer('boost')
-    force_boost = mbf.calc_blob_blob_forces_boost(r_vectors, blob_radius=a, debye_length=b, repulsion_strength=eps, periodic_length=L)
-    timer('boost')
-
   if found_cpp:
     timer('cpp')
     force_cpp = mbf.calc_blob_blob_forces_cpp(r_vectors, blob_radius=a, debye_length=b, repulsion_strength=eps, periodic_length=L)
@@ -84,8 +79,6 @@ if __name__ == '__main__':
     print('|f_numba_tree - f_numba| / |f_numba| = ', np.linalg.norm(force_numba_tree - force_numba) / np.linalg.norm(force_numba))
   if found_pycuda:
     print('|f_numba - f_pycuda| / |f_pycuda| = ', np.linalg.norm(force_numba - force_pycuda) / np.linalg.norm(force_pycuda))
-  if found_boost:
-    print('|f_boost - f_python| / |f_python| = ', np.linalg.norm(force_boost - force_python) / np.linalg.norm(force_python))
   if found_cpp:
     print('|f_cpp - f_numba| / |f_numba| = ', np.linalg.norm(force_cpp - force_numba) / np.linalg.norm(force_numba))
 
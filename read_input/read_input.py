@@ -4,7 +4,6 @@ Simple class to read the input files to run a simulation.
 from __future__ import division, print_function
 import numpy as np
 import ntpath
-import sys
 
 class ReadInput(object):
   '''
@@ -126,7 +125,6 @@ class ReadInput(object):
          (self.scheme == 'Fixman') or \
          (self.scheme == 'stochastic_traction_AB') or \
          (self.scheme == 'stochastic_Slip_Mid_DLA'):
-        print('Obstacles are not implemented for scheme: ', self.scheme)
-        sys.exit()
+        raise ValueError('Obstacles are not implemented for scheme: ' + self.scheme)
 
     return